@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app
 from flask_login import login_required, current_user
-from models import db, User, File
+from models import db, User, File, ShareLink
+from sqlalchemy import or_
 from functools import wraps
 import os
 
@@ -27,6 +28,13 @@ def dashboard():
     total_used_bytes = sum(f.size for f in all_files)
     total_used_mb = round(total_used_bytes / (1024 * 1024), 2)
     
+    # Compression at rest savings
+    compressed_files = [f for f in all_files if f.encoding]
+    compressed_original_bytes = sum(f.size for f in compressed_files)
+    compressed_stored_bytes = sum(f.stored_size or 0 for f in compressed_files)
+    saved_mb = round((compressed_original_bytes - compressed_stored_bytes) / (1024 * 1024), 2)
+    compression_ratio = round(compressed_original_bytes / compressed_stored_bytes, 1) if compressed_stored_bytes > 0 else 1.0
+    
     # Calculate global allocated space (Quota)
     total_allocated_mb = sum(getattr(u, 'storage_limit', 5120) for u in users)
     total_unused_allocated_mb = total_allocated_mb - total_used_mb
@@ -54,6 +62,9 @@ def dashboard():
                            total_used_mb=total_used_mb,
                            total_allocated_mb=total_allocated_mb,
                            total_unused_mb=total_unused_allocated_mb,
+                           compressed_count=len(compressed_files),
+                           saved_mb=saved_mb,
+                           compression_ratio=compression_ratio,
                            users=users_data)
 
 @admin_bp.route('/admin/delete_user/<int:user_id>', methods=['POST'])
@@ -83,6 +94,10 @@ def delete_user(user_id):
     # User model files relationship doesn't have cascade specified in models.py snippet I saw.
     # It says: keys = db.relationship('File', backref='owner', lazy=True)
     # We should delete files manually from DB to be clean.
+    # The bulk delete below skips the File.share_links cascade; drop the links
+    # first so a public token can't resolve to a reused file id later.
+    file_ids = [f.id for f in File.query.filter_by(owner_id=user.id).all()]
+    ShareLink.query.filter(or_(ShareLink.owner_id == user.id, ShareLink.file_id.in_(file_ids))).delete(synchronize_session=False)
     File.query.filter_by(owner_id=user.id).delete()
     db.session.delete(user)
     db.session.commit()
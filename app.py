@@ -11,6 +11,18 @@ app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'storage')
 # Use persistent storage path for DB
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(app.config['UPLOAD_FOLDER'], 'database.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Transparent gzip compression at rest for text-like uploads
+app.config['COMPRESS_AT_REST'] = os.environ.get('COMPRESS_AT_REST', '1') == '1'
+# Public share links: CDN cache lifetime and download counter batching
+app.config['SHARE_CACHE_MAX_AGE'] = int(os.environ.get('SHARE_CACHE_MAX_AGE', 3600))
+app.config['SHARE_COUNTER_FLUSH_SIZE'] = 50
+app.config['SHARE_COUNTER_FLUSH_INTERVAL'] = 30 # seconds
+# Concurrent blob writers per batch upload request
+app.config['UPLOAD_BATCH_WORKERS'] = int(os.environ.get('UPLOAD_BATCH_WORKERS', 8))
+# Files per batch upload request. Each file is two form parts ('files' and
+# 'paths') and its own spooled temp file, so this stays well under Flask's
+# MAX_FORM_PARTS (1000); the dashboard splits larger folders into batches.
+app.config['UPLOAD_BATCH_MAX_FILES'] = 200
 
 # Initialize extensions
 db.init_app(app)
@@ -30,6 +42,9 @@ app.register_blueprint(chat_bp)
 from admin import admin_bp
 app.register_blueprint(admin_bp)
 
+from share import share_bp, start_flush_timer
+app.register_blueprint(share_bp)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -55,6 +70,7 @@ def create_app():
         try:
             inspector = inspect(db.engine)
             columns = [c['name'] for c in inspector.get_columns('user')]
+            file_columns = [c['name'] for c in inspector.get_columns('file')]
             
             with db.engine.connect() as conn:
                 transaction = conn.begin()
@@ -63,6 +79,10 @@ def create_app():
                         conn.execute(text('ALTER TABLE user ADD COLUMN is_admin BOOLEAN DEFAULT 0'))
                     if 'storage_limit' not in columns:
                         conn.execute(text('ALTER TABLE user ADD COLUMN storage_limit INTEGER DEFAULT 5120'))
+                    if 'stored_size' not in file_columns:
+                        conn.execute(text('ALTER TABLE file ADD COLUMN stored_size INTEGER'))
+                    if 'encoding' not in file_columns:
+                        conn.execute(text('ALTER TABLE file ADD COLUMN encoding VARCHAR(16)'))
                     transaction.commit()
                 except Exception as e:
                     transaction.rollback()
@@ -70,6 +90,8 @@ def create_app():
         except Exception as e:
             print(f"Inspector error (DB might not exist yet): {e}")
 
+        start_flush_timer(app)
+
         # Create root storage dir if not exists
         if not os.path.exists(app.config['UPLOAD_FOLDER']):
             os.makedirs(app.config['UPLOAD_FOLDER'])
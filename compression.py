@@ -0,0 +1,70 @@
+import gzip
+import mimetypes
+import os
+import zlib
+
+# Content types worth compressing at rest. Everything else (images, video,
+# archives, office docs) is already compressed and is stored as-is.
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/xml',
+    'application/javascript',
+    'application/x-ndjson',
+    'application/sql',
+    'image/svg+xml',
+)
+COMPRESSIBLE_EXTENSIONS = ('.log', '.csv', '.tsv', '.json', '.jsonl', '.ndjson', '.xml', '.txt', '.md', '.sql', '.yaml', '.yml')
+
+CHUNK_SIZE = 64 * 1024
+SAMPLE_SIZE = 64 * 1024
+# Skip compression unless the sample shrinks to at most this fraction of its size
+MIN_RATIO = 0.9
+GZIP_LEVEL = 6
+
+def is_compressible(filename, content_type=None):
+    content_type = content_type or mimetypes.guess_type(filename)[0] or ''
+    if content_type.startswith(COMPRESSIBLE_TYPES):
+        return True
+    return filename.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+
+def sample_ratio(sample):
+    if not sample:
+        return 1.0
+    return len(zlib.compress(sample, 1)) / len(sample)
+
+def save_upload(file_storage, file_path, compress=True):
+    """
+    Stream an uploaded file to disk, gzip-compressing it on the way when the
+    content type is compressible and a leading sample compresses well.
+    Returns (encoding, original_size, stored_size); encoding is None for raw blobs.
+    """
+    stream = file_storage.stream
+    sample = stream.read(SAMPLE_SIZE)
+
+    encoding = None
+    if compress and is_compressible(file_storage.filename, file_storage.mimetype) and sample_ratio(sample) <= MIN_RATIO:
+        encoding = 'gzip'
+
+    original_size = 0
+    with open(file_path, 'wb') as raw:
+        out = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) if encoding else raw
+        try:
+            chunk = sample
+            while chunk:
+                out.write(chunk)
+                original_size += len(chunk)
+                chunk = stream.read(CHUNK_SIZE)
+        finally:
+            if encoding:
+                out.close()
+
+    return encoding, original_size, os.path.getsize(file_path)
+
+def iter_decompressed(file_path):
+    with gzip.open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
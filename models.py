@@ -21,11 +21,14 @@ class File(db.Model):
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     path = db.Column(db.String(512), nullable=True) # Physical path for files
     size = db.Column(db.Integer, default=0)
+    stored_size = db.Column(db.Integer, nullable=True) # Bytes on disk (equals size for raw blobs); NULL for rows uploaded before compression at rest
+    encoding = db.Column(db.String(16), nullable=True) # 'gzip' or None for raw blobs
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Self-referential relationship for folders
     children = db.relationship('File', backref=db.backref('parent', remote_side=[id]), lazy=True)
     permissions = db.relationship('Permission', backref='file', lazy=True, cascade="all, delete-orphan")
+    share_links = db.relationship('ShareLink', backref='file', lazy=True, cascade="all, delete-orphan")
 
 class Permission(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -33,6 +36,15 @@ class Permission(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     role = db.Column(db.String(20), nullable=False) # 'owner', 'editor', 'viewer'
 
+class ShareLink(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('file.id'), nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    secret = db.Column(db.String(32), nullable=False) # Random per link, signed into the token so reused ids can't match
+    expires_at = db.Column(db.DateTime, nullable=False)
+    download_count = db.Column(db.Integer, default=0) # Flushed in batches by share.py
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Message(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -1,7 +1,10 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_from_directory, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_from_directory, current_app, Response, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from models import db, File, Permission, User
+from models import db, File, Permission, User, ShareLink
+from compression import save_upload, iter_decompressed
+from concurrent.futures import ThreadPoolExecutor
+import mimetypes
 import os
 import uuid
 
@@ -83,6 +86,7 @@ def analytics():
     my_file_count = len(my_files)
     largest_file_size = max([f.size for f in my_files]) if my_files else 0
     largest_files = sorted(my_files, key=lambda x: x.size, reverse=True)[:5]
+    share_links = ShareLink.query.filter_by(owner_id=current_user.id).order_by(ShareLink.created_at.desc()).all()
     
     users = User.query.all()
     user_stats = []
@@ -101,6 +105,7 @@ def analytics():
                            my_file_count=my_file_count, 
                            largest_file_size=largest_file_size,
                            largest_files=largest_files,
+                           share_links=share_links,
                            user_stats=user_stats)
 
 @main.route('/share_file', methods=['POST'])
@@ -153,6 +158,11 @@ def share_file():
     db.session.commit()
     return get_redirect()
 
+def add_folder(name, parent_id, owner_id):
+    new_folder = File(name=name, is_folder=True, parent_id=parent_id, owner_id=owner_id)
+    db.session.add(new_folder)
+    return new_folder
+
 @main.route('/create_folder', methods=['POST'])
 @login_required
 def create_folder():
@@ -171,8 +181,7 @@ def create_folder():
         flash('Folder name required', 'warning')
         return redirect(url_for('main.dashboard', folder_id=parent_id))
         
-    new_folder = File(name=name, is_folder=True, parent_id=parent_id, owner_id=current_user.id)
-    db.session.add(new_folder)
+    add_folder(name, parent_id, current_user.id)
     db.session.commit()
     flash('Folder created', 'success')
     return redirect(url_for('main.dashboard', folder_id=parent_id))
@@ -210,12 +219,12 @@ def upload_file():
         unique_filename = str(uuid.uuid4()) + "_" + filename
         file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
         
-        file.save(file_path)
+        encoding, original_size, stored_size = save_upload(file, file_path, compress=current_app.config['COMPRESS_AT_REST'])
         
         new_file = File(
             name=filename, is_folder=False, parent_id=parent_id,
             owner_id=current_user.id, path=unique_filename,
-            size=os.path.getsize(file_path)
+            size=original_size, stored_size=stored_size, encoding=encoding
         )
         db.session.add(new_file)
         db.session.commit()
@@ -223,6 +232,113 @@ def upload_file():
         
     return redirect(url_for('main.dashboard', folder_id=parent_id))
 
+@main.route('/upload_batch', methods=['POST'])
+@login_required
+def upload_batch():
+    """
+    Upload many files in one request. Each file may carry a relative path
+    (form field 'paths', parallel to 'files', or the filename itself) and
+    intermediate folders are created as needed. Blobs are written by a
+    bounded thread pool first; folders and file rows are then inserted in one
+    short transaction so the SQLite write lock isn't held during the writes.
+    """
+    files = request.files.getlist('files')
+    paths = request.form.getlist('paths')
+    if not files:
+        return jsonify({'error': 'No files'}), 400
+    max_files = current_app.config['UPLOAD_BATCH_MAX_FILES']
+    if len(files) > max_files:
+        return jsonify({'error': f'Too many files in one batch ({len(files)}); send at most {max_files} per request'}), 413
+
+    parent_id = request.form.get('parent_id')
+    try:
+        parent_id = int(parent_id) if parent_id and parent_id != 'None' else None
+    except ValueError:
+        return jsonify({'error': 'Invalid parent_id'}), 400
+
+    if parent_id:
+        parent = File.query.get(parent_id)
+        if not parent or not parent.is_folder:
+            return jsonify({'error': 'Parent folder not found'}), 404
+        role = get_user_role(parent, current_user)
+        if role not in ['owner', 'editor']:
+            return jsonify({'error': 'Permission denied (Read Only)'}), 403
+
+    rejected = []
+    jobs = []
+
+    for i, file in enumerate(files):
+        rel_path = paths[i] if i < len(paths) and paths[i] else file.filename
+        parts = [p for p in rel_path.replace('\\', '/').split('/') if p not in ('', '.', '..')]
+        filename = secure_filename(parts[-1]) if parts else ''
+        if not filename:
+            rejected.append({'name': rel_path, 'error': 'Invalid filename'})
+            continue
+
+        is_clean, message = scan_file(file)
+        if not is_clean:
+            rejected.append({'name': rel_path, 'error': message})
+            continue
+
+        unique_filename = str(uuid.uuid4()) + "_" + filename
+        jobs.append((file, filename, tuple(parts[:-1]), unique_filename))
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    compress = current_app.config['COMPRESS_AT_REST']
+
+    def write_blob(job):
+        file, _, _, unique_filename = job
+        return save_upload(file, os.path.join(upload_folder, unique_filename), compress=compress)
+
+    rows = []
+    folder_ids = {(): parent_id}
+    folders_created = 0
+    try:
+        with ThreadPoolExecutor(max_workers=current_app.config['UPLOAD_BATCH_WORKERS']) as pool:
+            results = list(pool.map(write_blob, jobs))
+
+        # Resolve intermediate folders, reusing ones that already exist
+        for _, _, dirs, _ in jobs:
+            for depth in range(1, len(dirs) + 1):
+                key = dirs[:depth]
+                if key in folder_ids:
+                    continue
+                query = File.query.filter_by(name=key[-1], is_folder=True, parent_id=folder_ids[key[:-1]])
+                if folder_ids[key[:-1]] is None:
+                    query = query.filter_by(owner_id=current_user.id)
+                folder = query.first()
+                if not folder:
+                    folder = add_folder(key[-1], folder_ids[key[:-1]], current_user.id)
+                    db.session.flush()
+                    folders_created += 1
+                folder_ids[key] = folder.id
+
+        for (_, filename, dirs, unique_filename), (encoding, original_size, stored_size) in zip(jobs, results):
+            rows.append({
+                'name': filename, 'is_folder': False, 'parent_id': folder_ids[dirs],
+                'owner_id': current_user.id, 'path': unique_filename,
+                'size': original_size, 'stored_size': stored_size, 'encoding': encoding
+            })
+        if rows:
+            db.session.execute(db.insert(File), rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for job in jobs:
+            full_path = os.path.join(upload_folder, job[3])
+            if os.path.exists(full_path):
+                os.remove(full_path)
+        print(f"Batch upload error: {e}")
+        return jsonify({'error': 'Batch upload failed'}), 500
+
+    return jsonify({
+        'uploaded': len(rows),
+        'folders_created': folders_created,
+        'total_bytes': sum(r['size'] for r in rows),
+        'stored_bytes': sum(r['stored_size'] for r in rows),
+        'rejected': rejected
+    })
+
 @main.route('/download/<int:file_id>')
 @login_required
 def download_file(file_id):
@@ -230,7 +346,35 @@ def download_file(file_id):
     if not check_access(file_record, current_user):
         flash('Permission denied', 'danger')
         return redirect(url_for('main.dashboard'))
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], file_record.path, download_name=file_record.name)
+    return send_file_record(file_record)
+
+def send_file_record(file_record):
+    """
+    Serve a stored blob. Compressed blobs are passed through as-is when the
+    client accepts their encoding, otherwise decompressed while streaming.
+    The decompressed stream cannot seek, so it answers If-None-Match but
+    advertises Accept-Ranges: none; resumable downloads need gzip passthrough.
+    """
+    if not file_record.encoding:
+        return send_from_directory(current_app.config['UPLOAD_FOLDER'], file_record.path, download_name=file_record.name)
+
+    mimetype = mimetypes.guess_type(file_record.name)[0] or 'application/octet-stream'
+    if request.accept_encodings[file_record.encoding]:
+        response = send_from_directory(current_app.config['UPLOAD_FOLDER'], file_record.path,
+                                       download_name=file_record.name, mimetype=mimetype)
+        response.headers['Content-Encoding'] = file_record.encoding
+    else:
+        full_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file_record.path)
+        response = Response(iter_decompressed(full_path), mimetype=mimetype)
+        response.headers['Content-Length'] = file_record.size
+        response.headers['Accept-Ranges'] = 'none'
+        response.headers.set('Content-Disposition', 'inline', filename=file_record.name)
+        # Distinct from the passthrough ETag, which describes the gzip bytes
+        response.set_etag(f'{file_record.path}-{file_record.stored_size}-identity')
+        response.last_modified = os.path.getmtime(full_path)
+        response = response.make_conditional(request)
+    response.vary.add('Accept-Encoding')
+    return response
 
 @main.route('/delete/<int:file_id>', methods=['POST'])
 @login_required
@@ -0,0 +1,185 @@
+from flask import Blueprint, request, redirect, url_for, flash, abort, current_app
+from flask_login import login_required, current_user
+from itsdangerous import URLSafeSerializer, BadSignature
+from models import db, File, ShareLink
+from routes import send_file_record
+from datetime import datetime, timedelta, timezone
+import atexit
+import threading
+import time
+import uuid
+
+share_bp = Blueprint('share', __name__)
+
+# Download counts are buffered in memory and written in batches so that
+# hot public links don't turn every hit into a write transaction. A batch is
+# written once it reaches SHARE_COUNTER_FLUSH_SIZE, and a background timer
+# flushes whatever is pending every SHARE_COUNTER_FLUSH_INTERVAL seconds.
+_pending_counts = {}
+_counts_lock = threading.Lock()
+_flush_timer_started = False
+
+def get_serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='share-link')
+
+def make_token(link):
+    return get_serializer().dumps([link.id, link.secret])
+
+def load_link(token):
+    """
+    Verify a share token and load its ShareLink by primary key; no user or
+    permission lookups. The signed secret must match the row, so a token
+    can't resolve to a later link that reused a deleted link's id. Revoked
+    links and links whose file was deleted are gone, and expired ones get 410.
+    """
+    try:
+        link_id, secret = get_serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        abort(404)
+    link = db.session.get(ShareLink, link_id)
+    if not link or link.secret != secret:
+        abort(404)
+    if link.expires_at <= datetime.utcnow():
+        abort(410)
+    return link
+
+def expires_ts(link):
+    return link.expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+def is_within(file_record, root_id):
+    curr = file_record
+    while curr:
+        if curr.id == root_id:
+            return True
+        curr = File.query.get(curr.parent_id) if curr.parent_id else None
+    return False
+
+def record_download(link_id):
+    with _counts_lock:
+        _pending_counts[link_id] = _pending_counts.get(link_id, 0) + 1
+        pending = sum(_pending_counts.values())
+    if pending >= current_app.config['SHARE_COUNTER_FLUSH_SIZE']:
+        flush_download_counts()
+
+def flush_download_counts():
+    with _counts_lock:
+        counts = dict(_pending_counts)
+        _pending_counts.clear()
+    if not counts:
+        return
+    try:
+        for link_id, count in counts.items():
+            ShareLink.query.filter_by(id=link_id).update({ShareLink.download_count: ShareLink.download_count + count})
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        # Put the counts back so the next flush retries them
+        with _counts_lock:
+            for link_id, count in counts.items():
+                _pending_counts[link_id] = _pending_counts.get(link_id, 0) + count
+        print(f"Error flushing share counters: {e}")
+
+def start_flush_timer(app):
+    """
+    Flush pending counts every SHARE_COUNTER_FLUSH_INTERVAL seconds and at
+    exit. Safe to call repeatedly; only the first call starts anything.
+    """
+    global _flush_timer_started
+    if _flush_timer_started:
+        return
+    _flush_timer_started = True
+
+    def flush():
+        with app.app_context():
+            flush_download_counts()
+
+    def run():
+        flush()
+        schedule()
+
+    def schedule():
+        timer = threading.Timer(app.config['SHARE_COUNTER_FLUSH_INTERVAL'], run)
+        timer.daemon = True
+        timer.start()
+
+    atexit.register(flush)
+    schedule()
+
+def cacheable(response, link):
+    # Public and cookie-free so the CDN in front of the tunnel can cache it,
+    # but never past the link's expiry. send_from_directory marks responses
+    # no-cache, which CDNs refuse to store, so clear that.
+    max_age = max(0, min(current_app.config['SHARE_CACHE_MAX_AGE'], int(expires_ts(link) - time.time())))
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.s_maxage = max_age
+    response.expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
+    return response
+
+@share_bp.route('/share_link', methods=['POST'])
+@login_required
+def create_link():
+    file_record = File.query.get_or_404(request.form.get('file_id'))
+    redirect_url = url_for('main.dashboard', folder_id=file_record.parent_id)
+
+    if file_record.owner_id != current_user.id:
+        flash('Only owner can share', 'danger')
+        return redirect(redirect_url)
+
+    try:
+        days = int(request.form.get('expires_days', 7))
+    except ValueError:
+        days = 7
+    days = max(1, min(days, 365))
+
+    link = ShareLink(file_id=file_record.id, owner_id=current_user.id, secret=uuid.uuid4().hex,
+                     expires_at=datetime.utcnow() + timedelta(days=days))
+    db.session.add(link)
+    db.session.commit()
+
+    flash(f'Public link (expires in {days} days): ' + url_for('share.public_root', token=make_token(link), _external=True), 'success')
+    return redirect(redirect_url)
+
+@share_bp.route('/share_link/<int:link_id>/revoke', methods=['POST'])
+@login_required
+def revoke_link(link_id):
+    link = ShareLink.query.get_or_404(link_id)
+    if link.owner_id != current_user.id:
+        flash('Only owner can revoke', 'danger')
+        return redirect(url_for('main.analytics'))
+
+    db.session.delete(link)
+    db.session.commit()
+    flash('Public link revoked', 'success')
+    return redirect(url_for('main.analytics'))
+
+@share_bp.route('/s/<token>')
+def public_root(token):
+    link = load_link(token)
+    return serve_shared(token, link, link.file_id)
+
+@share_bp.route('/s/<token>/<int:file_id>')
+def public_item(token, file_id):
+    link = load_link(token)
+    return serve_shared(token, link, file_id)
+
+def serve_shared(token, link, file_id):
+    root_id = link.file_id
+    root = File.query.get(root_id)
+    if not root or root.owner_id != link.owner_id:
+        abort(404)
+    file_record = File.query.get(file_id)
+    if not file_record or not is_within(file_record, root_id):
+        abort(404)
+
+    if file_record.is_folder:
+        files = File.query.filter_by(parent_id=file_record.id).order_by(File.is_folder.desc(), File.name).all()
+        # Rendered without context processors: Flask-Login's would load the
+        # session user and add Vary: Cookie, defeating the CDN cache.
+        template = current_app.jinja_env.get_template('shared_folder.html')
+        response = current_app.make_response(template.render(token=token, folder=file_record, files=files, root_id=root_id))
+        return cacheable(response, link)
+
+    record_download(link.id)
+    return cacheable(send_file_record(file_record), link)
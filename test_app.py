@@ -0,0 +1,276 @@
+import gzip
+import io
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# app.py derives its storage folder and database from the working directory
+# at import time, so point it at a scratch directory before importing.
+STORAGE_ROOT = tempfile.mkdtemp()
+os.chdir(STORAGE_ROOT)
+os.makedirs('storage')
+
+from app import app, create_app
+from models import db, File, ShareLink, User
+import routes
+import share
+
+create_app()
+app.config['TESTING'] = True
+
+@pytest.fixture
+def client():
+    c = app.test_client()
+    c.post('/login', data={'username': 'admin', 'password': 'admin'})
+    return c
+
+def upload(client, name, content, parent_id=''):
+    client.post('/upload', data={'file': (io.BytesIO(content), name), 'parent_id': parent_id},
+                content_type='multipart/form-data')
+    with app.app_context():
+        return File.query.filter_by(name=name).order_by(File.id.desc()).first().id
+
+def test_gzip_round_trip(client):
+    content = b'time,level,msg\n' + b'2026-01-01,INFO,hello world\n' * 5000
+    file_id = upload(client, 'round_trip.csv', content)
+    with app.app_context():
+        record = db.session.get(File, file_id)
+        assert record.encoding == 'gzip'
+        assert record.size == len(content)
+        assert record.stored_size < len(content)
+
+    resp = client.get(f'/download/{file_id}', headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(resp.data) == content
+
+    resp = client.get(f'/download/{file_id}', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.headers['Accept-Ranges'] == 'none'
+    assert resp.data == content
+
+    resp = client.get(f'/download/{file_id}', headers={'Accept-Encoding': 'identity', 'Range': 'bytes=0-10'})
+    assert resp.status_code == 200
+    assert resp.data == content
+
+    etag = resp.headers['ETag']
+    resp = client.get(f'/download/{file_id}', headers={'Accept-Encoding': 'identity', 'If-None-Match': etag})
+    assert resp.status_code == 304
+
+def test_incompressible_upload_stored_raw(client):
+    content = os.urandom(4096)
+    file_id = upload(client, 'noise.bin', content)
+    with app.app_context():
+        record = db.session.get(File, file_id)
+        assert record.encoding is None
+        assert record.stored_size == len(content)
+    assert client.get(f'/download/{file_id}').data == content
+
+def create_share_link(client, file_id):
+    resp = client.post('/share_link', data={'file_id': file_id, 'expires_days': 7}, follow_redirects=True)
+    return re.search(r'http://localhost(/s/[^\s<]+)', resp.get_data(as_text=True)).group(1)
+
+def create_folder(client, name, parent_id=''):
+    client.post('/create_folder', data={'name': name, 'parent_id': parent_id})
+    with app.app_context():
+        return File.query.filter_by(name=name, is_folder=True).order_by(File.id.desc()).first().id
+
+def test_share_link_serves_folder_tree(client):
+    root_id = create_folder(client, 'shared_root')
+    sub_id = create_folder(client, 'shared_sub', root_id)
+    file_id = upload(client, 'shared_doc.txt', b'shared content', sub_id)
+    outside_id = upload(client, 'unshared_doc.txt', b'private content')
+    url = create_share_link(client, root_id)
+
+    anon = app.test_client()
+    resp = anon.get(url)
+    assert resp.status_code == 200
+    assert 'shared_sub' in resp.get_data(as_text=True)
+    assert 'Set-Cookie' not in resp.headers
+
+    resp = anon.get(f'{url}/{file_id}')
+    assert resp.status_code == 200
+    assert resp.data == b'shared content'
+    assert resp.cache_control.public
+    assert not resp.cache_control.no_cache
+    assert resp.expires <= datetime.now(resp.expires.tzinfo) + timedelta(seconds=resp.cache_control.max_age + 5)
+
+    assert anon.get(f'{url}/{outside_id}').status_code == 404
+    assert anon.get(url[:-2] + 'xx').status_code == 404
+
+def test_share_link_compressed_file_varies_on_encoding(client):
+    content = b'id,value\n' + b'1,shared csv row\n' * 2000
+    file_id = upload(client, 'shared_export.csv', content)
+    url = create_share_link(client, file_id)
+    anon = app.test_client()
+
+    resp = anon.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(resp.data) == content
+    assert 'Accept-Encoding' in resp.vary
+    assert resp.cache_control.public
+    assert not resp.cache_control.no_cache
+
+    resp = anon.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.data == content
+    assert 'Accept-Encoding' in resp.vary
+    assert resp.cache_control.public
+    assert not resp.cache_control.no_cache
+
+def test_share_link_expired(client):
+    file_id = upload(client, 'expiring.txt', b'soon gone')
+    url = create_share_link(client, file_id)
+    with app.app_context():
+        link = ShareLink.query.filter_by(file_id=file_id).first()
+        link.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+    assert app.test_client().get(url).status_code == 410
+
+def test_share_link_revoked(client):
+    file_id = upload(client, 'revoked.txt', b'revoked')
+    url = create_share_link(client, file_id)
+    with app.app_context():
+        link_id = ShareLink.query.filter_by(file_id=file_id).first().id
+    client.post(f'/share_link/{link_id}/revoke')
+    assert app.test_client().get(url).status_code == 404
+
+def test_share_link_dead_after_delete_and_id_reuse(client):
+    file_id = upload(client, 'pub.bin', b'public')
+    url = create_share_link(client, file_id)
+    client.post(f'/delete/{file_id}')
+
+    # SQLite reuses the highest rowid, so bob's file (and link) may take the same ids
+    bob = app.test_client()
+    bob.post('/register', data={'username': 'bob', 'password': 'bob'})
+    bob_file_id = upload(bob, 'secret.bin', b'BOB PRIVATE SECRET')
+    create_share_link(bob, bob_file_id)
+
+    anon = app.test_client()
+    assert anon.get(url).status_code == 404
+    assert anon.get(f'{url}/{bob_file_id}').status_code == 404
+
+def test_share_link_dead_after_owner_deleted(client):
+    alice = app.test_client()
+    alice.post('/register', data={'username': 'alice', 'password': 'alice'})
+    file_id = upload(alice, 'a.txt', b'alice public')
+    url = create_share_link(alice, file_id)
+    with app.app_context():
+        alice_id = User.query.filter_by(username='alice').first().id
+    client.post(f'/admin/delete_user/{alice_id}')
+    with app.app_context():
+        assert ShareLink.query.filter_by(owner_id=alice_id).count() == 0
+
+    carol = app.test_client()
+    carol.post('/register', data={'username': 'carol', 'password': 'carol'})
+    upload(carol, 'secret.txt', b'CAROL SECRET')
+    assert app.test_client().get(url).status_code == 404
+
+def test_share_counter_flush_failure_keeps_counts(monkeypatch):
+    def failing_commit():
+        raise RuntimeError('database is locked')
+
+    with app.app_context():
+        share._pending_counts[999] = 3
+        monkeypatch.setattr(db.session, 'commit', failing_commit)
+        share.flush_download_counts()
+        monkeypatch.undo()
+        assert share._pending_counts.pop(999) == 3
+
+def test_share_link_download_counts(client):
+    file_id = upload(client, 'counted.txt', b'count me')
+    url = create_share_link(client, file_id)
+    app.config['SHARE_COUNTER_FLUSH_SIZE'] = 1
+    try:
+        anon = app.test_client()
+        anon.get(url)
+        anon.get(url)
+    finally:
+        app.config['SHARE_COUNTER_FLUSH_SIZE'] = 50
+    with app.app_context():
+        assert ShareLink.query.filter_by(file_id=file_id).first().download_count == 2
+
+def upload_batch(client, entries, parent_id=''):
+    files = [(io.BytesIO(content), os.path.basename(path)) for path, content in entries]
+    paths = [path for path, _ in entries]
+    return client.post('/upload_batch', data={'files': files, 'paths': paths, 'parent_id': parent_id},
+                       content_type='multipart/form-data')
+
+def test_batch_upload_builds_and_reuses_tree(client):
+    resp = upload_batch(client, [
+        ('tree/a.csv', b'a,1\n' * 100),
+        ('tree/sub/b.txt', b'b'),
+        ('tree/sub/deep/c.txt', b'c'),
+        ('tree/virus.txt', b'x'),
+    ])
+    assert resp.status_code == 200
+    assert resp.json['uploaded'] == 3
+    assert resp.json['folders_created'] == 3
+    assert [r['name'] for r in resp.json['rejected']] == ['tree/virus.txt']
+
+    resp = upload_batch(client, [('tree/sub/d.txt', b'd')])
+    assert resp.json['folders_created'] == 0
+    with app.app_context():
+        d = File.query.filter_by(name='d.txt').first()
+        assert d.parent.name == 'sub'
+        assert d.parent.parent.name == 'tree'
+        assert File.query.filter_by(name='sub', is_folder=True).count() == 1
+
+def test_batch_upload_rejects_oversized_batch(client):
+    max_files = app.config['UPLOAD_BATCH_MAX_FILES']
+    resp = upload_batch(client, [(f'big/{i}.txt', b'x') for i in range(max_files + 1)])
+    assert resp.status_code == 413
+    assert 'at most' in resp.json['error']
+
+def test_batch_upload_holds_no_write_lock_while_writing_blobs(client, monkeypatch):
+    real_save_upload = routes.save_upload
+    lock_free = []
+
+    def probing_save_upload(file_storage, file_path, compress=True):
+        conn = sqlite3.connect(os.path.join(app.config['UPLOAD_FOLDER'], 'database.db'), timeout=0)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.rollback()
+            lock_free.append(True)
+        except sqlite3.OperationalError:
+            lock_free.append(False)
+        finally:
+            conn.close()
+        return real_save_upload(file_storage, file_path, compress)
+
+    monkeypatch.setattr(routes, 'save_upload', probing_save_upload)
+    resp = upload_batch(client, [('locktest/new/a.txt', b'a'), ('locktest/new/b.txt', b'b')])
+    assert resp.status_code == 200
+    assert lock_free == [True, True]
+
+def test_batch_upload_bad_parent_returns_json(client):
+    resp = upload_batch(client, [('x.txt', b'x')], parent_id='abc')
+    assert resp.status_code == 400
+    assert resp.json['error'] == 'Invalid parent_id'
+    resp = upload_batch(client, [('x.txt', b'x')], parent_id='999999')
+    assert resp.status_code == 404
+    assert resp.json['error'] == 'Parent folder not found'
+
+def test_batch_upload_rolls_back_on_failure(client, monkeypatch):
+    real_save_upload = routes.save_upload
+
+    def failing_save_upload(file_storage, file_path, compress=True):
+        result = real_save_upload(file_storage, file_path, compress)
+        if file_storage.filename == 'boom.txt':
+            raise IOError('disk full')
+        return result
+
+    monkeypatch.setattr(routes, 'save_upload', failing_save_upload)
+    blobs_before = set(os.listdir(app.config['UPLOAD_FOLDER']))
+    resp = upload_batch(client, [
+        ('rollback/ok.txt', b'ok'),
+        ('rollback/nested/boom.txt', b'boom'),
+    ])
+    assert resp.status_code == 500
+    assert set(os.listdir(app.config['UPLOAD_FOLDER'])) == blobs_before
+    with app.app_context():
+        assert File.query.filter_by(name='rollback').count() == 0
+        assert File.query.filter_by(name='ok.txt').count() == 0